@@ -1,35 +1,102 @@
+import bisect
 import configparser
+import heapq
 import logging
+import sys
 from collections import defaultdict
 from typing import List
 
 config = configparser.ConfigParser()
 config.read('config.ini')
 
+_MAX_TRANSACTION_DEPTH = config.getint('DEFAULT', 'MAX_TRANSACTION_DEPTH', fallback=100)
+_MAX_DB_SIZE = config.getint('DEFAULT', 'MAX_DB_SIZE', fallback=100000)
+_LOG_FILE = config.get('DEFAULT', 'LOG_FILE', fallback='db_logs.log')
+_MAX_PENDING_INSORTS = 64
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that flushes every `capacity` records instead of after each one
+
+    Warnings and errors are flushed immediately; whatever is left
+    is flushed by logging.shutdown at interpreter exit
+    """
+    def __init__(self, filename: str, capacity: int = 64):
+        super().__init__(filename)
+        self.capacity = capacity
+        self._pending = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            self._pending += 1
+            if self._pending >= self.capacity or record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self._pending = 0
+        super().flush()
+
+
+def _get_logger() -> logging.Logger:
+    """
+    Function returns the audit logger, configured once per process
+    """
+    logger = logging.getLogger("InMemoryDB")
+    if not logger.handlers:
+        file_handler = _BufferedFileHandler(_LOG_FILE)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(file_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
 class InMemoryDB:
+    __slots__ = (
+        "_main_db",
+        "_counts",
+        "_value_index",
+        "_sorted_keys",
+        "_pending_keys",
+        "_transaction_stack",
+        "_versions",
+        "_frame_pool",
+        "__MAX_TRANSACTION_DEPTH",
+        "__MAX_DB_SIZE",
+        "logger",
+    )
+
     def __init__(self):
         """
         Database initialization method
 
         _main_db - main data store
         _counts - counting the number of values
+        _value_index - keys of the main data store grouped by value
+        _sorted_keys - sorted copies of _value_index entries
+        _pending_keys - keys (added, removed) since a sorted copy was last brought up to date
         _transaction_stack - transaction storage stack
+        _versions - values written by open transactions, per key,
+        as (transaction depth, value) pairs with the visible one last
+        _frame_pool - finished transaction frames kept for reuse
         __MAX_TRANSACTION_DEPTH - maximum transaction depth
         __MAX_DB_SIZE - maximum database size
         logger - logger for audit
         """
         self._main_db = {}
         self._counts = defaultdict(int)
+        self._value_index = {}
+        self._sorted_keys = {}
+        self._pending_keys = {}
         self._transaction_stack = []
-        self.__MAX_TRANSACTION_DEPTH = config.getint('DEFAULT', 'MAX_TRANSACTION_DEPTH', fallback=100)
-        self.__MAX_DB_SIZE = config.getint('DEFAULT', 'MAX_DB_SIZE', fallback=100000)
-
-        logging.basicConfig(
-            filename=config.get('DEFAULT', 'LOG_FILE', fallback='db_logs.log'),
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger("InMemoryDB")
+        self._versions = {}
+        self._frame_pool = []
+        self.__MAX_TRANSACTION_DEPTH = _MAX_TRANSACTION_DEPTH
+        self.__MAX_DB_SIZE = _MAX_DB_SIZE
+        self.logger = _get_logger()
 
     @property
     def db_size(self) -> int:
@@ -51,85 +118,267 @@ class InMemoryDB:
         """
         Method for validating input parameters
         """
-        if not (isinstance(key, str) and key.isalnum()):
+        if not (type(key) is str and key.isalnum()):
             raise ValueError("Key must be alphanumeric string")
-        if not (isinstance(value, str) and value.isalnum()):
+        if not (type(value) is str and value.isalnum()):
             raise ValueError("Value must be alphanumeric string")
 
     def _validate_string(self, string: str) -> bool:
         """
         Method for validating key
         """
-        return not isinstance(string, str) or not string.isalnum()
+        return not (type(string) is str and string.isalnum())
 
-    def _get_effective_db(self) -> dict[str, str]:
-        effective_db = dict(self._main_db)
-        for transaction in self._transaction_stack:
-            for key, value in transaction["updates"].items():
-                if value == "NULL":
-                    effective_db.pop(key, None)
-                else:
-                    effective_db[key] = value
+    def _current_value(self, key: str) -> str | None:
+        """
+        Method returns the value visible through the transaction stack
+        (None if the key is not set)
+        """
+        versions = self._versions.get(key)
+        if versions is not None:
+            value = versions[-1][1]
+            return None if value == "NULL" else value
+        return self._main_db.get(key)
 
-        return effective_db
+    def _track_delta(self, transaction: dict, previous: str | None, value: str) -> None:
+        """
+        Method for updating the value counters of a transaction
+        """
+        delta = transaction["delta"]
+        if previous is not None:
+            delta[previous] -= 1
+        if value != "NULL":
+            delta[value] += 1
+
+    def _write_update(self, transaction: dict, key: str, value: str) -> None:
+        """
+        Method for recording a write in the current transaction
+        """
+        transaction["updates"][key] = value
+        depth = len(self._transaction_stack)
+        versions = self._versions.get(key)
+        if versions is None:
+            self._versions[key] = [(depth, value)]
+        elif versions[-1][0] == depth:
+            versions[-1] = (depth, value)
+        else:
+            versions.append((depth, value))
+
+    def _drop_versions(self, transaction: dict) -> None:
+        """
+        Method for removing the versions written by the top transaction
+        """
+        all_versions = self._versions
+        for key in transaction["updates"]:
+            versions = all_versions[key]
+            versions.pop()
+            if not versions:
+                del all_versions[key]
 
     def _key_with_value(self, value: str) -> List[str] | str:
+        """
+        Method returns the sorted keys holding the value, taking open
+        transactions into account
+        """
         if self._validate_string(value):
             return "ERROR: Invalid value format"
 
-        effective_db = self._get_effective_db()
-        keys = [k for k, v in effective_db.items() if v == value]
+        keys = self._sorted_value_keys(value)
+        if not self._transaction_stack:
+            return list(keys)
+
+        if value == "NULL":
+            overrides = dict.fromkeys(self._versions, False)
+        else:
+            overrides = {key: versions[-1][1] == value for key, versions in self._versions.items()}
+        kept = [key for key in keys if key not in overrides]
+        added = sorted(key for key, matches in overrides.items() if matches)
+        return list(heapq.merge(kept, added))
+
+    def _sorted_value_keys(self, value: str) -> List[str]:
+        """
+        Method returns the sorted keys of the main data store holding the value
+        """
+        keys = self._sorted_keys.get(value)
+        if keys is None:
+            keys = sorted(self._value_index.get(value, ()))
+            if keys:
+                self._sorted_keys[value] = keys
+            return keys
+
+        pending = self._pending_keys.pop(value, None)
+        if pending is not None:
+            added, removed = pending
+            if len(added) + len(removed) <= _MAX_PENDING_INSORTS:
+                for key in removed:
+                    del keys[bisect.bisect_left(keys, key)]
+                for key in added:
+                    bisect.insort(keys, key)
+            else:
+                if removed:
+                    keys = [key for key in keys if key not in removed]
+                keys += sorted(added)
+                keys.sort()
+                self._sorted_keys[value] = keys
         return keys
 
+    def _track_sorted_keys(self, value: str, added=(), removed=()) -> None:
+        """
+        Method for recording index changes of a value with a sorted copy
+
+        The copy is dropped once the pending changes outgrow it
+        """
+        keys = self._sorted_keys.get(value)
+        if keys is None:
+            return
+        if value not in self._value_index:
+            del self._sorted_keys[value]
+            self._pending_keys.pop(value, None)
+            return
+
+        pending = self._pending_keys.get(value)
+        if pending is None:
+            pending = self._pending_keys[value] = (set(), set())
+        pending_added, pending_removed = pending
+        for key in added:
+            if key in pending_removed:
+                pending_removed.discard(key)
+            else:
+                pending_added.add(key)
+        for key in removed:
+            if key in pending_added:
+                pending_added.discard(key)
+            else:
+                pending_removed.add(key)
+        if len(pending_added) + len(pending_removed) > len(keys):
+            del self._sorted_keys[value]
+            del self._pending_keys[value]
+
     def set_value(self, key: str, value: str) -> None:
         """
         Method to set a value
         """
         self._validate_key_value(key, value)
-        if self.db_size >= self.__MAX_DB_SIZE:
+        key = sys.intern(key)
+        value = sys.intern(value)
+        if len(self._main_db) >= self.__MAX_DB_SIZE:
             self.logger.error("Database is full")
             raise MemoryError("Database size limit reached")
 
         if self._transaction_stack:
-            if self.transaction_depth >= self.__MAX_TRANSACTION_DEPTH:
-                self.logger.error("Transaction depth reached")
-                raise RecursionError("Maximum transaction depth reached")
-
-            current_transaction = self._transaction_stack[-1]
-            if key not in current_transaction["old_values"]:
-                current_transaction["old_values"][key] = self._main_db.get(key)
-            current_transaction["updates"][key] = value
-            self.logger.info(f"SET in transaction: {key} = {value}")
+            previous = self._current_value(key)
+            if previous != value or value == "NULL":
+                current_transaction = self._transaction_stack[-1]
+                self._track_delta(current_transaction, previous, value)
+                self._write_update(current_transaction, key, value)
+            self.logger.info("SET in transaction: %s = %s", key, value)
         else:
             self._update_main_db(key, value)
-            self.logger.info(f"SET: {key} = {value}")
+            self.logger.info("SET: %s = %s", key, value)
 
     def _update_main_db(self, key: str, value: str) -> None:
         """
         Method for updating the database
         """
-        if key in self._main_db:
-            old_values = self._main_db[key]
-            self._counts[old_values] -= 1
-            if self._counts[old_values] == 0:
-                del self._counts[old_values]
+        main_db = self._main_db
+        old_value = main_db.get(key)
+        if old_value == value:
+            return
+        if old_value is not None:
+            self._unindex_value(key, old_value)
 
-        self._main_db[key] = value
+        main_db[key] = value
         self._counts[value] += 1
+        value_keys = self._value_index.get(value)
+        if value_keys is None:
+            self._value_index[value] = {key}
+        else:
+            value_keys.add(key)
+        if value in self._sorted_keys:
+            self._track_sorted_keys(value, added=(key,))
+
+    def _unindex_value(self, key: str, value: str) -> None:
+        """
+        Method for removing a key's value from the counters and the value index
+        """
+        counts = self._counts
+        count = counts[value] - 1
+        if count:
+            counts[value] = count
+        else:
+            del counts[value]
+
+        keys = self._value_index[value]
+        keys.discard(key)
+        if not keys:
+            del self._value_index[value]
+        if value in self._sorted_keys:
+            self._track_sorted_keys(value, removed=(key,))
+
+    def _apply_transaction(self, transaction: dict) -> None:
+        """
+        Method for writing a top-level transaction into the database
+
+        The counters take the transaction's net delta in one pass and
+        the value index is updated once per affected value
+        """
+        main_db = self._main_db
+        removed = defaultdict(set)
+        added = defaultdict(set)
+        for key, value in transaction["updates"].items():
+            old_value = main_db.get(key)
+            if value == "NULL":
+                if old_value is None:
+                    continue
+                del main_db[key]
+            elif old_value == value:
+                continue
+            else:
+                main_db[key] = value
+                added[value].add(key)
+            if old_value is not None:
+                removed[old_value].add(key)
+
+        counts = self._counts
+        for value, count in transaction["delta"].items():
+            if count:
+                count += counts.get(value, 0)
+                if count:
+                    counts[value] = count
+                else:
+                    del counts[value]
+
+        value_index = self._value_index
+        sorted_keys = self._sorted_keys
+        for value, keys in removed.items():
+            remaining = value_index[value]
+            remaining.difference_update(keys)
+            if not remaining:
+                del value_index[value]
+            if value in sorted_keys:
+                self._track_sorted_keys(value, removed=keys)
+        for value, keys in added.items():
+            current = value_index.get(value)
+            if current is None:
+                value_index[value] = keys
+            else:
+                current.update(keys)
+            if value in sorted_keys:
+                self._track_sorted_keys(value, added=keys)
 
     def get_value(self, key: str) -> str:
         """
         Method to get value from database by key
         """
         if self._validate_string(key):
-            self.logger.error(f"Invalid key. key = {key}")
+            self.logger.error("Invalid key. key = %s", key)
             return "ERROR: Invalid key format"
 
-        for transaction in reversed(self._transaction_stack):
-            if key in transaction["updates"]:
-                return transaction["updates"][key]
+        versions = self._versions.get(key)
+        if versions is not None:
+            return versions[-1][1]
 
-        self.logger.info(f"Successfully retrieved value by key: {key}")
+        self.logger.info("Successfully retrieved value by key: %s", key)
         return self._main_db.get(key, "NULL")
 
     def unset_value(self, key: str) -> None:
@@ -141,32 +390,50 @@ class InMemoryDB:
 
         if self._transaction_stack:
             current_transaction = self._transaction_stack[-1]
-            if key not in current_transaction["old_values"]:
-                current_transaction["old_values"][key] = self._main_db.get(key)
-            current_transaction["updates"][key] = "NULL"
-            self.logger.info(f"UNSET in transaction: {key}")
+            self._track_delta(current_transaction, self._current_value(key), "NULL")
+            self._write_update(current_transaction, key, "NULL")
+            self.logger.info("UNSET in transaction: %s", key)
         else:
-            if key in self._main_db:
-                value = self._main_db[key]
-                del self._main_db[key]
-                self._counts[value] -= 1
-                if self._counts[value] == 0:
-                    del self._counts[value]
-                self.logger.info(f"UNSET: {key}")
+            value = self._main_db.pop(key, None)
+            if value is not None:
+                self._unindex_value(key, value)
+                self.logger.info("UNSET: %s", key)
 
     def count_values(self, value: str) -> int | str:
         """
         Method for calculating values with verification
         """
-        count_values = self._key_with_value(value)
-        return len(count_values) if isinstance(count_values, list) else count_values
+        if self._validate_string(value):
+            return "ERROR: Invalid value format"
+
+        count = self._counts.get(value, 0)
+        for transaction in self._transaction_stack:
+            count += transaction["delta"].get(value, 0)
+        return count
 
     def find_keys(self, value: str) -> List[str] | str:
         """
         Method for finding keys with verification
         """
         find_keys = self._key_with_value(value)
-        return sorted(find_keys) if isinstance(find_keys, list) and find_keys else "NULL"
+        return find_keys if isinstance(find_keys, list) and find_keys else "NULL"
+
+    def _acquire_frame(self) -> dict:
+        """
+        Method returns an empty transaction frame, reusing a pooled one if possible
+        """
+        if self._frame_pool:
+            return self._frame_pool.pop()
+        return {"updates": {}, "delta": defaultdict(int)}
+
+    def _release_frame(self, transaction: dict) -> None:
+        """
+        Method clears a finished transaction frame and returns it to the pool
+        """
+        transaction["updates"].clear()
+        transaction["delta"].clear()
+        if len(self._frame_pool) < self.__MAX_TRANSACTION_DEPTH:
+            self._frame_pool.append(transaction)
 
     def begin_transaction(self) -> None:
         """
@@ -174,7 +441,7 @@ class InMemoryDB:
         """
         if len(self._transaction_stack) >= self.__MAX_TRANSACTION_DEPTH:
             raise RecursionError("Maximum transaction depth reached")
-        self._transaction_stack.append({"updates": {}, "old_values": {}})
+        self._transaction_stack.append(self._acquire_frame())
         self.logger.info("BEGIN TRANSACTION")
 
     def rollback_transaction(self) -> bool:
@@ -185,7 +452,9 @@ class InMemoryDB:
             self.logger.warning("ROLLBACK attempted with no active transactions")
             return False
 
-        self._transaction_stack.pop()
+        transaction = self._transaction_stack.pop()
+        self._drop_versions(transaction)
+        self._release_frame(transaction)
         self.logger.info("ROLLBACK TRANSACTION")
         return True
 
@@ -198,21 +467,16 @@ class InMemoryDB:
             return False
 
         transaction = self._transaction_stack.pop()
+        self._drop_versions(transaction)
         if self._transaction_stack:
             parent_transaction = self._transaction_stack[-1]
             for key, value in transaction["updates"].items():
-                if key not in parent_transaction["old_values"]:
-                    parent_transaction["old_values"][key] = self._main_db.get(key)
-                parent_transaction["updates"][key] = value
+                self._write_update(parent_transaction, key, value)
+            parent_delta = parent_transaction["delta"]
+            for value, count in transaction["delta"].items():
+                parent_delta[value] += count
         else:
-            for key, value in transaction["updates"].items():
-                if value == "NULL" and key in self._main_db:
-                    old_values = self._main_db[key]
-                    del self._main_db[key]
-                    self._counts[old_values] -= 1
-                    if self._counts[old_values] == 0:
-                        del self._counts[old_values]
-                else:
-                    self._update_main_db(key, value)
+            self._apply_transaction(transaction)
+        self._release_frame(transaction)
         self.logger.info("COMMIT TRANSACTION")
         return True
\ No newline at end of file
@@ -1,3 +1,5 @@
+import sys
+
 from database import InMemoryDB
 
 
@@ -8,54 +10,67 @@ def main():
     print("Available commands: SET, GET, UNSET, COUNTS, FIND, BEGIN, ROLLBACK, COMMIT, END")
 
     command_handlers = {
-        "END": lambda _: db.logger.info("SESSION ENDED") or exit(0),
-        "SET": lambda args: db.set_value(args[0], args[1]) if len(args) == 2 else print("UNKNOWN COMMAND"),
-        "GET": lambda args: print(db.get_value(args[0])) if len(args) == 1 else print("UNKNOWN COMMAND"),
-        "UNSET": lambda args: db.unset_value(args[0]) if len(args) == 1 else print("UNKNOWN COMMAND"),
-        "COUNTS": lambda args: print(db.count_values(args[0])) if len(args) == 1 else print("UNKNOWN COMMAND"),
-        "FIND": lambda args: print(db.find_keys(args[0]) if isinstance(db.find_keys(args[0]), str) else " ".join(db.find_keys(args[0]))) if len(args) == 1 else print("UNKNOWN COMMAND"),
-        "BEGIN": lambda _: db.begin_transaction(),
-        "ROLLBACK": lambda _: print("NO TRANSACTION") if not db.rollback_transaction() else None,
-        "COMMIT": lambda _: print("NO TRANSACTION") if not db.commit_transaction() else None,
+        "SET": (db.set_value, 2),
+        "GET": (db.get_value, 1),
+        "UNSET": (db.unset_value, 1),
+        "COUNTS": (db.count_values, 1),
+        "FIND": (db.find_keys, 1),
+        "BEGIN": (db.begin_transaction, 0),
+        "ROLLBACK": (db.rollback_transaction, 0),
+        "COMMIT": (db.commit_transaction, 0),
     }
 
-    while True:
-        try:
-            user_input = input("> ").split(" ")
-            if not user_input:
-                continue
+    write = sys.stdout.write
+    interactive = sys.stdin.isatty()
+
+    try:
+        write("> ")
+        if interactive:
+            sys.stdout.flush()
+        for line in sys.stdin:
+            parts = line.rstrip("\n").split(" ", 2)
+            command = parts[0].upper()
+            args = parts[1:]
 
-            command = user_input[0].upper()
-            args = user_input[1:]
+            if command == "END":
+                db.logger.info("SESSION ENDED")
+                return
 
             try:
-                if command in command_handlers:
-                    command_handlers[command](args)
+                handler = command_handlers.get(command)
+                if handler is None or (handler[1] and len(args) != handler[1]):
+                    write("UNKNOWN COMMAND\n")
                 else:
-                    print("UNKNOWN COMMAND")
+                    result = handler[0](*args[:handler[1]])
+                    if result is False:
+                        write("NO TRANSACTION\n")
+                    elif isinstance(result, list):
+                        write(" ".join(result) + "\n")
+                    elif result is not None and result is not True:
+                        write(f"{result}\n")
             except ValueError as e:
-                print(f"ERROR: {e}")
-                db.logger.error(f"Input error: {e}")
+                write(f"ERROR: {e}\n")
+                db.logger.error("Input error: %s", e)
             except MemoryError as e:
-                print(f"ERROR: {e}")
-                db.logger.error(f"Error with memory: {e}")
+                write(f"ERROR: {e}\n")
+                db.logger.error("Error with memory: %s", e)
             except RecursionError as e:
-                print(f"ERROR: {e}")
-                db.logger.error(f"Error with transaction: {e}")
-
-        except EOFError:
-            db.logger.info(f"Session terminated by EOF")
-            print("\nSESSION ENDED")
-            break
-        except KeyboardInterrupt:
-            db.logger.info(f"Session terminated by user")
-            print("\nSESSION INTERRUPTED")
-            break
-        except Exception as e:
-            print(f"CRITICAL ERROR: {str(e)}")
-            db.logger.critical(f"Unspecified error: {str(e)}")
-            break
+                write(f"ERROR: {e}\n")
+                db.logger.error("Error with transaction: %s", e)
+
+            write("> ")
+            if interactive:
+                sys.stdout.flush()
+
+        db.logger.info("Session terminated by EOF")
+        print("\nSESSION ENDED")
+    except KeyboardInterrupt:
+        db.logger.info("Session terminated by user")
+        print("\nSESSION INTERRUPTED")
+    except Exception as e:
+        print(f"CRITICAL ERROR: {str(e)}")
+        db.logger.critical("Unspecified error: %s", e)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
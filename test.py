@@ -24,6 +24,15 @@ class TestInMemoryDB(unittest.TestCase):
         value_after_rollback = self.db.get_value('a')
         self.assertEqual(value_after_rollback, '1')
 
+    def test_set_at_max_transaction_depth(self):
+        for _ in range(self.db._InMemoryDB__MAX_TRANSACTION_DEPTH):
+            self.db.begin_transaction()
+        with self.assertRaises(RecursionError):
+            self.db.begin_transaction()
+
+        self.db.set_value('a', '1')
+        self.assertEqual(self.db.get_value('a'), '1')
+
     def test_count_values(self):
         self.db.set_value('a', '1')
         self.db.set_value('b', '1')
@@ -32,6 +41,73 @@ class TestInMemoryDB(unittest.TestCase):
         self.assertEqual(self.db.count_values('2'), 1)
         self.assertEqual(self.db.count_values('3'), 0)
 
+    def test_count_values_in_transaction(self):
+        self.db.set_value('a', '1')
+        self.db.set_value('b', '1')
+        self.db.begin_transaction()
+        self.db.set_value('a', '2')
+        self.db.begin_transaction()
+        self.db.unset_value('b')
+        self.db.set_value('c', '2')
+        self.assertEqual(self.db.count_values('1'), 0)
+        self.assertEqual(self.db.count_values('2'), 2)
+
+        self.db.commit_transaction()
+        self.assertEqual(self.db.count_values('2'), 2)
+
+        self.db.rollback_transaction()
+        self.assertEqual(self.db.count_values('1'), 2)
+        self.assertEqual(self.db.count_values('2'), 0)
+
+    def test_set_same_value(self):
+        self.db.set_value('a', '1')
+        self.db.set_value('a', '1')
+        self.assertEqual(self.db.count_values('1'), 1)
+
+        self.db.begin_transaction()
+        self.db.set_value('a', '1')
+        self.assertEqual(self.db.count_values('1'), 1)
+        self.assertEqual(self.db.find_keys('1'), ['a'])
+        self.db.commit_transaction()
+        self.assertEqual(self.db.count_values('1'), 1)
+
+    def test_commit_unset_of_null_value(self):
+        self.db.set_value('c', 'NULL')
+        self.db.begin_transaction()
+        self.db.unset_value('c')
+        self.db.commit_transaction()
+        self.assertEqual(self.db.count_values('NULL'), 0)
+        self.assertEqual(self.db.find_keys('NULL'), 'NULL')
+        self.assertEqual(self.db.db_size, 0)
+
+        self.db.unset_value('c')
+        self.assertEqual(self.db.count_values('NULL'), 0)
+
+    def test_commit_updates_value_index_in_place(self):
+        for i in range(1000):
+            self.db.set_value(f'k{i}', '1')
+        index_keys = self.db._value_index['1']
+
+        self.db.begin_transaction()
+        self.db.set_value('a', '1')
+        self.db.set_value('k0', '2')
+        self.db.commit_transaction()
+
+        self.assertIs(self.db._value_index['1'], index_keys)
+        self.assertEqual(len(index_keys), 1000)
+        self.assertIn('a', index_keys)
+        self.assertNotIn('k0', index_keys)
+        self.assertEqual(self.db.find_keys('2'), ['k0'])
+
+    def test_set_null_in_transaction_deletes_key(self):
+        self.db.set_value('a', 'NULL')
+        self.db.begin_transaction()
+        self.db.set_value('a', 'NULL')
+        self.db.commit_transaction()
+        self.assertEqual(self.db.db_size, 0)
+        self.assertEqual(self.db.find_keys('NULL'), 'NULL')
+        self.assertEqual(self.db.count_values('NULL'), 0)
+
     def test_find_keys(self):
         self.db.set_value('a', '1')
         self.db.set_value('b', '1')
@@ -40,6 +116,70 @@ class TestInMemoryDB(unittest.TestCase):
         self.assertEqual(self.db.find_keys('2'), ['c'])
         self.assertEqual(self.db.find_keys('3'), 'NULL')
 
+    def test_find_keys_in_transaction(self):
+        self.db.set_value('a', '1')
+        self.db.set_value('b', '1')
+        self.db.begin_transaction()
+        self.db.set_value('a', '2')
+        self.db.begin_transaction()
+        self.db.set_value('c', '1')
+        self.db.unset_value('b')
+        self.assertEqual(self.db.find_keys('1'), ['c'])
+        self.assertEqual(self.db.find_keys('2'), ['a'])
+
+        self.db.rollback_transaction()
+        self.assertEqual(self.db.find_keys('1'), ['b'])
+
+    def test_find_keys_sorted(self):
+        self.db.set_value('c', '1')
+        self.db.set_value('b', '1')
+        self.db.set_value('a', '1')
+        self.assertEqual(self.db.find_keys('1'), ['a', 'b', 'c'])
+
+        self.db.begin_transaction()
+        self.db.set_value('e', '1')
+        self.db.set_value('d', '1')
+        self.db.unset_value('b')
+        self.assertEqual(self.db.find_keys('1'), ['a', 'c', 'd', 'e'])
+        self.db.commit_transaction()
+        self.assertEqual(self.db.find_keys('1'), ['a', 'c', 'd', 'e'])
+
+    def test_find_keys_sorted_after_many_writes(self):
+        keys = [f'k{i:03}' for i in range(200)]
+        for key in reversed(keys):
+            self.db.set_value(key, '1')
+        self.assertEqual(self.db.find_keys('1'), keys)
+
+        for key in keys[::4]:
+            self.db.unset_value(key)
+        for i in range(50):
+            self.db.set_value(f'j{i:03}', '1')
+        expected = sorted(set(keys) - set(keys[::4]) | {f'j{i:03}' for i in range(50)})
+        self.assertEqual(self.db.find_keys('1'), expected)
+
+    def test_find_null_ignores_unset_in_transaction(self):
+        self.db.set_value('a', '1')
+        self.db.begin_transaction()
+        self.db.unset_value('a')
+        self.db.unset_value('zz')
+        self.assertEqual(self.db.find_keys('NULL'), 'NULL')
+        self.assertEqual(self.db.count_values('NULL'), 0)
+
+    def test_find_keys_after_overwrite_and_unset(self):
+        self.db.set_value('a', '1')
+        self.db.set_value('b', '1')
+        self.db.set_value('a', '2')
+        self.db.unset_value('b')
+        self.assertEqual(self.db.find_keys('1'), 'NULL')
+        self.assertEqual(self.db.find_keys('2'), ['a'])
+
+        self.db.begin_transaction()
+        self.db.unset_value('c')
+        self.db.set_value('b', '2')
+        self.db.commit_transaction()
+        self.assertEqual(self.db.find_keys('2'), ['a', 'b'])
+        self.assertEqual(self.db.get_value('c'), 'NULL')
+
 
 
 if __name__ == '__main__':